@@ -20,7 +20,8 @@ class CacheManager:
             'market_data': 180,    # 3 minutes
             'ai_predictions': 3600, # 1 hour
             'portfolio_data': 300,  # 5 minutes
-            'gas_prices': 120      # 2 minutes
+            'gas_prices': 120,     # 2 minutes
+            'training_data': 300   # 5 minutes
         }
 
     async def initialize(self):
@@ -213,6 +214,36 @@ class CacheManager:
         key = self._generate_key("gas_prices", chain.lower())
         return await self.get(key)
 
+    async def cache_training_data(self, model_type: str, days: int, training_data: Dict[str, Any],
+                                ttl: Optional[int] = None) -> bool:
+        """Cache prepared training data, pickled so arrays, Decimals and datetimes survive."""
+        key = self._generate_key("training_data", f"{model_type}:{days}")
+        try:
+            if not self.redis:
+                return False
+
+            actual_ttl = ttl or self.default_ttls['training_data']
+            await self.redis.setex(key, actual_ttl, pickle.dumps(training_data))
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error caching training data {key}: {e}")
+            return False
+
+    async def get_cached_training_data(self, model_type: str, days: int) -> Optional[Dict[str, Any]]:
+        """Get cached training data."""
+        key = self._generate_key("training_data", f"{model_type}:{days}")
+        try:
+            if not self.redis:
+                return None
+
+            value = await self.redis.get(key)
+            return pickle.loads(value) if value is not None else None
+
+        except Exception as e:
+            self.logger.error(f"Error getting cached training data {key}: {e}")
+            return None
+
     async def batch_cache_prices(self, price_data_dict: Dict[str, Dict[str, Any]], 
                                ttl: Optional[int] = None) -> Dict[str, bool]:
         """Cache multiple price data entries."""
@@ -1,12 +1,49 @@
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Sequence, Union
 from datetime import datetime, timedelta
 import asyncpg
 import pandas as pd
 from contextlib import asynccontextmanager
 import json
 
+# Hot read queries are kept as fixed text so asyncpg's per-connection
+# prepared-statement cache serves every call after the first
+PRICE_HISTORY_SQL = """
+    SELECT timestamp, price, volume, price_change_24h
+    FROM price_data
+    WHERE symbol = $1 AND timestamp >= $2
+    ORDER BY timestamp DESC
+"""
+
+_YIELD_OPPORTUNITIES_SELECT = """
+    SELECT DISTINCT ON (protocol, pool_name, chain)
+           protocol, pool_name, apy, tvl, risk_score, category, 
+           chain, contract_address, token_symbols, minimum_deposit, 
+           lock_period, last_updated
+    FROM yield_data
+"""
+
+YIELD_OPPORTUNITIES_SQL = _YIELD_OPPORTUNITIES_SELECT + """
+    WHERE apy >= $1 AND tvl >= $2
+    ORDER BY protocol, pool_name, chain, last_updated DESC, apy DESC
+    LIMIT $3
+"""
+
+YIELD_OPPORTUNITIES_BY_CHAIN_SQL = _YIELD_OPPORTUNITIES_SELECT + """
+    WHERE apy >= $1 AND tvl >= $2 AND chain = ANY($3)
+    ORDER BY protocol, pool_name, chain, last_updated DESC, apy DESC
+    LIMIT $4
+"""
+
+def _encode_json(value: Union[Dict[str, Any], str, bytes]) -> str:
+    """Encode a value for a JSONB column, passing already-encoded JSON through."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
 class DatabaseManager:
     def __init__(self, connection_string: str):
         self.connection_string = connection_string
@@ -300,10 +337,12 @@ class DatabaseManager:
             return False
 
     async def store_ai_prediction(self, model_type: str, input_data: Dict[str, Any], 
-                                prediction: Dict[str, Any], confidence: float, 
+                                prediction: Union[Dict[str, Any], str, bytes], confidence: float, 
                                 model_version: str = "1.0") -> bool:
-        """Store AI prediction."""
+        """Store AI prediction. ``prediction`` may be a dict or already-encoded JSON."""
         try:
+            prediction_json = _encode_json(prediction)
+
             async with self.get_connection() as conn:
                 await conn.execute(
                     """
@@ -313,7 +352,7 @@ class DatabaseManager:
                     """,
                     model_type,
                     json.dumps(input_data),
-                    json.dumps(prediction),
+                    prediction_json,
                     float(confidence),
                     model_version,
                     datetime.now()
@@ -325,25 +364,62 @@ class DatabaseManager:
             self.logger.error(f"Error storing AI prediction: {e}")
             return False
 
+    async def store_ai_predictions_batch(self, rows: List[Dict[str, Any]], chunk_size: int = 500) -> int:
+        """Store many AI predictions with one multi-row INSERT per chunk.
+
+        Each row needs ``model_type``, ``input_data``, ``prediction`` and ``confidence``;
+        ``model_version`` defaults to "1.0". Returns the number of rows stored.
+        """
+        try:
+            if not rows:
+                return 0
+
+            timestamp = datetime.now()
+            records = [
+                (
+                    row['model_type'],
+                    json.dumps(row['input_data']),
+                    _encode_json(row['prediction']),
+                    float(row['confidence']),
+                    row.get('model_version', "1.0"),
+                    timestamp
+                )
+                for row in rows
+            ]
+
+            async with self.get_connection() as conn:
+                async with conn.transaction():
+                    for start in range(0, len(records), chunk_size):
+                        chunk = records[start:start + chunk_size]
+                        values = ', '.join(
+                            f"(${i * 6 + 1}, ${i * 6 + 2}, ${i * 6 + 3}, ${i * 6 + 4}, ${i * 6 + 5}, ${i * 6 + 6})"
+                            for i in range(len(chunk))
+                        )
+                        await conn.execute(
+                            f"""
+                            INSERT INTO ai_predictions 
+                            (model_type, input_data, prediction, confidence, model_version, timestamp)
+                            VALUES {values}
+                            """,
+                            *(value for record in chunk for value in record)
+                        )
+
+            return len(records)
+
+        except Exception as e:
+            self.logger.error(f"Error storing AI predictions batch: {e}")
+            return 0
+
     async def get_price_history(self, symbol: str, days: int = 30) -> pd.DataFrame:
         """Get price history for a symbol."""
         try:
             async with self.get_connection() as conn:
                 cutoff_date = datetime.now() - timedelta(days=days)
                 
-                rows = await conn.fetch(
-                    """
-                    SELECT timestamp, price, volume, price_change_24h
-                    FROM price_data
-                    WHERE symbol = $1 AND timestamp >= $2
-                    ORDER BY timestamp DESC
-                    """,
-                    symbol.upper(),
-                    cutoff_date
-                )
+                rows = await conn.fetch(PRICE_HISTORY_SQL, symbol.upper(), cutoff_date)
 
                 if rows:
-                    return pd.DataFrame([dict(row) for row in rows])
+                    return pd.DataFrame.from_records(rows, columns=list(rows[0].keys()))
                 else:
                     return pd.DataFrame()
 
@@ -356,29 +432,10 @@ class DatabaseManager:
         """Get yield opportunities based on criteria."""
         try:
             async with self.get_connection() as conn:
-                conditions = ["apy >= $1", "tvl >= $2"]
-                params = [min_apy, min_tvl]
-                param_count = 2
-
                 if chains:
-                    param_count += 1
-                    conditions.append(f"chain = ANY(${param_count})")
-                    params.append(chains)
-
-                param_count += 1
-                query = f"""
-                    SELECT DISTINCT ON (protocol, pool_name, chain)
-                           protocol, pool_name, apy, tvl, risk_score, category, 
-                           chain, contract_address, token_symbols, minimum_deposit, 
-                           lock_period, last_updated
-                    FROM yield_data
-                    WHERE {' AND '.join(conditions)}
-                    ORDER BY protocol, pool_name, chain, last_updated DESC, apy DESC
-                    LIMIT ${param_count}
-                """
-                params.append(limit)
-
-                rows = await conn.fetch(query, *params)
+                    rows = await conn.fetch(YIELD_OPPORTUNITIES_BY_CHAIN_SQL, min_apy, min_tvl, chains, limit)
+                else:
+                    rows = await conn.fetch(YIELD_OPPORTUNITIES_SQL, min_apy, min_tvl, limit)
                 
                 return [dict(row) for row in rows]
 
@@ -439,6 +496,34 @@ class DatabaseManager:
             self.logger.error(f"Error getting latest market data: {e}")
             return None
 
+    async def get_market_data_at(self, timestamps: Sequence[datetime]) -> List[Dict[str, Any]]:
+        """Get the latest market data row at or before each timestamp, in one query."""
+        try:
+            if not timestamps:
+                return []
+
+            async with self.get_connection() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT snapshot.*
+                    FROM unnest($1::timestamp[]) AS at(ts)
+                    CROSS JOIN LATERAL (
+                        SELECT * FROM market_data
+                        WHERE timestamp <= at.ts
+                        ORDER BY timestamp DESC
+                        LIMIT 1
+                    ) AS snapshot
+                    ORDER BY at.ts DESC
+                    """,
+                    list(timestamps)
+                )
+
+                return [dict(row) for row in rows]
+
+        except Exception as e:
+            self.logger.error(f"Error getting market data snapshots: {e}")
+            return []
+
     async def get_ai_predictions(self, model_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent AI predictions."""
         try:
@@ -31,17 +31,19 @@ class MarketAnalyzer:
         self.model = genai.GenerativeModel('gemini-pro')
         self.logger = logging.getLogger(__name__)
 
-    def analyze_market_conditions(self, market_data: Dict[str, Any]) -> MarketAnalysis:
+    def analyze_market_conditions(self, market_data: Dict[str, Any],
+                                  generation_config: Optional[Dict[str, Any]] = None) -> MarketAnalysis:
         """Analyze current market conditions and sentiment."""
         try:
             prompt = self._build_market_analysis_prompt(market_data)
             
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=1536
-                )
+                generation_config=genai.types.GenerationConfig(**{
+                    'temperature': 0.3,
+                    'max_output_tokens': 1536,
+                    **(generation_config or {})
+                })
             )
             
             result = self._parse_market_response(response.text)
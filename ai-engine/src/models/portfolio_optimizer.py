@@ -24,17 +24,19 @@ class PortfolioOptimizer:
         self.model = genai.GenerativeModel('gemini-pro')
         self.logger = logging.getLogger(__name__)
 
-    def optimize_portfolio(self, portfolio_data: Dict[str, Any], preferences: Dict[str, Any]) -> OptimizationResult:
+    def optimize_portfolio(self, portfolio_data: Dict[str, Any], preferences: Dict[str, Any],
+                           generation_config: Optional[Dict[str, Any]] = None) -> OptimizationResult:
         """Optimize portfolio allocation using modern portfolio theory principles."""
         try:
             prompt = self._build_optimization_prompt(portfolio_data, preferences)
             
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=2048
-                )
+                generation_config=genai.types.GenerationConfig(**{
+                    'temperature': 0.3,
+                    'max_output_tokens': 2048,
+                    **(generation_config or {})
+                })
             )
             
             result = self._parse_optimization_response(response.text)
@@ -30,17 +30,19 @@ class RiskAssessor:
         self.model = genai.GenerativeModel('gemini-pro')
         self.logger = logging.getLogger(__name__)
 
-    def assess_portfolio_risk(self, portfolio_data: Dict[str, Any]) -> RiskAssessment:
+    def assess_portfolio_risk(self, portfolio_data: Dict[str, Any],
+                              generation_config: Optional[Dict[str, Any]] = None) -> RiskAssessment:
         """Assess risk for entire portfolio."""
         try:
             prompt = self._build_portfolio_risk_prompt(portfolio_data)
             
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.2,
-                    max_output_tokens=1024
-                )
+                generation_config=genai.types.GenerationConfig(**{
+                    'temperature': 0.2,
+                    'max_output_tokens': 1024,
+                    **(generation_config or {})
+                })
             )
             
             result = self._parse_risk_response(response.text)
@@ -24,18 +24,20 @@ class YieldPredictor:
         self.model = genai.GenerativeModel('gemini-pro')
         self.logger = logging.getLogger(__name__)
 
-    def predict_yield(self, protocol_data: Dict[str, Any], timeframe_days: int = 7) -> YieldPrediction:
+    def predict_yield(self, protocol_data: Dict[str, Any], timeframe_days: int = 7,
+                      generation_config: Optional[Dict[str, Any]] = None) -> YieldPrediction:
         """Predict yield for a specific protocol using Gemini AI."""
         try:
             prompt = self._build_prediction_prompt(protocol_data, timeframe_days)
             
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=1024,
-                    candidate_count=1
-                )
+                generation_config=genai.types.GenerationConfig(**{
+                    'temperature': 0.3,
+                    'max_output_tokens': 1024,
+                    'candidate_count': 1,
+                    **(generation_config or {})
+                })
             )
             
             result = self._parse_prediction_response(response.text)
@@ -53,6 +55,43 @@ class YieldPredictor:
             self.logger.error(f"Error predicting yield: {e}")
             raise
 
+    def predict_yield_batch(self, protocols: List[Dict[str, Any]], timeframe_days: int = 7,
+                            generation_config: Optional[Dict[str, Any]] = None) -> List[YieldPrediction]:
+        """Predict yields for several protocols with a single Gemini request."""
+        try:
+            if not protocols:
+                return []
+            
+            prompt = self._build_batch_prediction_prompt(protocols, timeframe_days)
+            
+            response = self.model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(**{
+                    'temperature': 0.3,
+                    'max_output_tokens': min(8192, 512 * len(protocols)),
+                    'candidate_count': 1,
+                    **(generation_config or {})
+                })
+            )
+            
+            results = self._parse_batch_prediction_response(response.text, len(protocols))
+            
+            return [
+                YieldPrediction(
+                    protocol=protocol_data.get('name', 'Unknown'),
+                    predicted_apy=result['predicted_apy'],
+                    confidence=result['confidence'],
+                    trend=result['trend'],
+                    risk_score=result['risk_score'],
+                    timeframe_days=timeframe_days
+                )
+                for protocol_data, result in zip(protocols, results)
+            ]
+            
+        except Exception as e:
+            self.logger.error(f"Error predicting yield batch: {e}")
+            raise
+
     def optimize_yield(self, portfolio_data: Dict[str, Any], preferences: Dict[str, Any]) -> Dict[str, Any]:
         """Optimize yield allocation across multiple protocols."""
         try:
@@ -157,6 +196,42 @@ class YieldPredictor:
         }}
         """
 
+    def _build_batch_prediction_prompt(self, protocols: List[Dict[str, Any]], timeframe_days: int) -> str:
+        """Build a prompt that asks for one prediction per protocol."""
+        return f"""
+        You are an expert DeFi yield predictor. Analyze each protocol and predict its future yield.
+        
+        Protocols: {json.dumps(protocols, indent=2, default=str)}
+        Prediction Timeframe: {timeframe_days} days
+        
+        Consider these factors:
+        - Historical APY trends
+        - Protocol TVL changes
+        - Market conditions
+        - Smart contract risks
+        - Token economics
+        
+        Provide exactly one prediction per protocol, in the same order, as a JSON array:
+        [
+            {{
+                "predicted_apy": 7.5,
+                "confidence": 0.85,
+                "trend": "increasing/decreasing/stable",
+                "risk_score": 4,
+                "factors": ["market_conditions", "tvl_growth"],
+                "explanation": "Brief reasoning for prediction"
+            }}
+        ]
+        """
+
+    def _validate_prediction(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Check that a parsed prediction has every required field."""
+        required_fields = ['predicted_apy', 'confidence', 'trend', 'risk_score']
+        for field in required_fields:
+            if field not in result:
+                raise ValueError(f"Missing required field: {field}")
+        return result
+
     def _parse_prediction_response(self, response_text: str) -> Dict[str, Any]:
         """Parse Gemini AI response for yield prediction."""
         try:
@@ -171,12 +246,26 @@ class YieldPredictor:
             result = json.loads(json_str)
             
             # Validate required fields
-            required_fields = ['predicted_apy', 'confidence', 'trend', 'risk_score']
-            for field in required_fields:
-                if field not in result:
-                    raise ValueError(f"Missing required field: {field}")
+            return self._validate_prediction(result)
+            
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Failed to parse JSON response: {e}")
+            raise ValueError(f"Invalid JSON in AI response: {e}")
+
+    def _parse_batch_prediction_response(self, response_text: str, expected: int) -> List[Dict[str, Any]]:
+        """Parse a Gemini AI response holding a JSON array of yield predictions."""
+        try:
+            json_start = response_text.find('[')
+            json_end = response_text.rfind(']') + 1
+            
+            if json_start == -1 or json_end == 0:
+                raise ValueError("No JSON array found in response")
+            
+            results = json.loads(response_text[json_start:json_end])
+            if not isinstance(results, list) or len(results) != expected:
+                raise ValueError(f"Expected {expected} predictions, got {len(results) if isinstance(results, list) else 0}")
             
-            return result
+            return [self._validate_prediction(result) for result in results]
             
         except json.JSONDecodeError as e:
             self.logger.error(f"Failed to parse JSON response: {e}")
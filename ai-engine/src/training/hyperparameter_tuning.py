@@ -1,320 +1,423 @@
 import asyncio
+import functools
+import itertools
 import logging
 import json
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+import optuna
+from google.api_core import exceptions as google_exceptions
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
 from datetime import datetime
-import itertools
 import sys
 import os
+import time
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from models.yield_predictor import YieldPredictor
-from models.risk_assessor import RiskAssessor
-from models.portfolio_optimizer import PortfolioOptimizer
-from models.market_analyzer import MarketAnalyzer
 from utils.config import Config
 from utils.logger import setup_logger
+from utils.helpers import safe_json_dumps
 from training.evaluate import ModelEvaluator
 
+DEFAULT_TUNING_TRIALS = 20
+DEFAULT_TUNE_CONCURRENCY = 8
+PARAM_NAMES = ('temperature', 'max_output_tokens', 'top_p', 'top_k')
+DEFAULT_GEMINI_RATE_LIMIT = 60  # requests per minute
+LIMITER_GROWTH_STREAK = 100
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 2.0  # seconds, doubled per retry
+
+# Hyperparameter spaces for Gemini API configuration, keyed in PARAM_NAMES order
+HYPERPARAMETER_SPACES = {
+    'yield_prediction': {
+        'temperature': [0.1, 0.3, 0.5, 0.7],
+        'max_output_tokens': [512, 1024, 2048],
+        'top_p': [0.8, 0.9, 0.95],
+        'top_k': [20, 32, 40]
+    },
+    'risk_assessment': {
+        'temperature': [0.1, 0.2, 0.3],
+        'max_output_tokens': [1024, 1536, 2048],
+        'top_p': [0.8, 0.9],
+        'top_k': [32, 40]
+    },
+    'portfolio_optimization': {
+        'temperature': [0.2, 0.4, 0.6],
+        'max_output_tokens': [1536, 2048, 3072],
+        'top_p': [0.8, 0.9, 0.95],
+        'top_k': [32, 40, 48]
+    },
+    'market_analysis': {
+        'temperature': [0.2, 0.3, 0.4],
+        'max_output_tokens': [1024, 1536, 2048],
+        'top_p': [0.8, 0.9],
+        'top_k': [32, 40]
+    }
+}
+
+# Every configuration of each space as a tuple of values in PARAM_NAMES order
+_PARAM_COMBINATIONS = {
+    model_key: tuple(itertools.product(*(space[name] for name in PARAM_NAMES)))
+    for model_key, space in HYPERPARAMETER_SPACES.items()
+}
+
+def cached_eval(model_key: str):
+    """Memoize a config evaluator's (score, metrics) in the tuner's score cache."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, config: Dict[str, Any],
+                          trial: Optional[optuna.Trial] = None) -> Tuple[float, Dict[str, Any]]:
+            key = self._cache_key(model_key, config)
+            cached = self._score_cache.get(key)
+            if cached is not None:
+                return cached[0], cached[1]
+            
+            # A duplicate asked while the same configuration is still being
+            # evaluated waits for that evaluation instead of re-issuing the requests
+            pending = self._pending_evals.get(key)
+            if pending is not None:
+                try:
+                    return await pending
+                except optuna.TrialPruned:
+                    # That was the other trial's pruning decision, not ours;
+                    # evaluate again so this trial reports its own values
+                    pass
+            
+            task = asyncio.ensure_future(func(self, config, trial))
+            self._pending_evals[key] = task
+            try:
+                score, metrics = await task
+            finally:
+                # A re-evaluating duplicate may have registered its own task meanwhile
+                if self._pending_evals.get(key) is task:
+                    del self._pending_evals[key]
+            
+            # Failures may be transient (timeouts, quota), so only cache successes
+            if 'error' not in metrics:
+                self._score_cache[key] = (score, metrics)
+            return score, metrics
+        return wrapper
+    return decorator
+
+def _report_progress(trial: Optional[optuna.Trial], step: int, partial_score: float):
+    """Report an intermediate score and stop the trial early if the pruner rejects it."""
+    if trial is None:
+        return
+    trial.report(partial_score, step)
+    if trial.should_prune():
+        raise optuna.TrialPruned()
+
+class _AdaptiveLimiter:
+    """Rate-capped limiter for Gemini calls whose concurrency adapts AIMD-style to 429s."""
+
+    def __init__(self, max_concurrency: int, max_rate: float, logger: logging.Logger,
+                 period: float = 60.0):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.logger = logger
+        self._interval = period / max_rate
+        self._next_start = 0.0
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+        # Per-window call counts for the periodic throughput log
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._window_throttled = 0
+
+    async def acquire(self):
+        """Wait for a free concurrency slot and the next rate-limit start time."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, throttled: bool = False):
+        """Free a slot, halving the limit on a 429 or growing it after a success streak."""
+        async with self._cond:
+            self._in_flight -= 1
+            self._window_calls += 1
+            if throttled:
+                self._window_throttled += 1
+                self._successes = 0
+                self.limit = max(1, self.limit // 2)
+            else:
+                self._successes += 1
+                if self._successes >= LIMITER_GROWTH_STREAK and self.limit < self.max_concurrency:
+                    self._successes = 0
+                    self.limit += 1
+            self._log_window()
+            self._cond.notify_all()
+
+    def _log_window(self):
+        """Log effective request rate and concurrency once per minute."""
+        elapsed = time.monotonic() - self._window_start
+        if elapsed < 60:
+            return
+        self.logger.info(
+            f"Gemini calls: {self._window_calls / elapsed:.2f} req/s, "
+            f"{self._window_throttled} throttled, concurrency limit {self.limit}/{self.max_concurrency}"
+        )
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._window_throttled = 0
+
 class HyperparameterTuner:
     def __init__(self):
         self.config = Config()
         self.logger = setup_logger('hyperparameter_tuner')
         self.evaluator = ModelEvaluator()
         
-        # Hyperparameter spaces for Gemini API configuration
-        self.hyperparameter_spaces = {
-            'yield_prediction': {
-                'temperature': [0.1, 0.3, 0.5, 0.7],
-                'max_output_tokens': [512, 1024, 2048],
-                'top_p': [0.8, 0.9, 0.95],
-                'top_k': [20, 32, 40]
-            },
-            'risk_assessment': {
-                'temperature': [0.1, 0.2, 0.3],
-                'max_output_tokens': [1024, 1536, 2048],
-                'top_p': [0.8, 0.9],
-                'top_k': [32, 40]
-            },
-            'portfolio_optimization': {
-                'temperature': [0.2, 0.4, 0.6],
-                'max_output_tokens': [1536, 2048, 3072],
-                'top_p': [0.8, 0.9, 0.95],
-                'top_k': [32, 40, 48]
-            },
-            'market_analysis': {
-                'temperature': [0.2, 0.3, 0.4],
-                'max_output_tokens': [1024, 1536, 2048],
-                'top_p': [0.8, 0.9],
-                'top_k': [32, 40]
-            }
+        # Tuned parameters are applied per request, so the evaluator's model
+        # instances (and their Gemini clients) are shared by every trial
+        self._yield_predictor = self.evaluator.yield_predictor
+        self._risk_assessor = self.evaluator.risk_assessor
+        self._portfolio_optimizer = self.evaluator.portfolio_optimizer
+        self._market_analyzer = self.evaluator.market_analyzer
+        
+        # Bound concurrent trials across every tuner sharing this instance
+        self.concurrency = int(os.environ.get('TUNE_CONCURRENCY', DEFAULT_TUNE_CONCURRENCY))
+        self._sem = asyncio.Semaphore(self.concurrency)
+
+        # Individual Gemini requests stay under the API rate limit and back off on 429s
+        self._limiter = _AdaptiveLimiter(
+            self.concurrency,
+            float(os.environ.get('GEMINI_RATE_LIMIT', DEFAULT_GEMINI_RATE_LIMIT)),
+            self.logger
+        )
+
+        self._evaluators = {
+            'yield_prediction': self._evaluate_yield_prediction_config,
+            'risk_assessment': self._evaluate_risk_assessment_config,
+            'portfolio_optimization': self._evaluate_portfolio_optimization_config,
+            'market_analysis': self._evaluate_market_analysis_config
         }
+        
+        # (model, gemini model, config) -> (score, metrics), persisted across runs
+        self._score_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._pending_evals: Dict[str, asyncio.Future] = {}
+        self._score_cache_path = os.path.join(
+            self.config.get('MODEL_CACHE_DIR', './models'), 'tune_cache.json'
+        )
+        
+        # Every trial is streamed here as one JSON line instead of held in memory
+        self.results_path = os.path.join(
+            self.config.get('MODEL_CACHE_DIR', './models'),
+            f"tuning_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        )
+        self._results_fp = None
+        
+        # Optuna studies persist here so reruns warm-start from earlier trials
+        self._study_storage_path = os.path.join(
+            self.config.get('MODEL_CACHE_DIR', './models'), 'tune_history.db'
+        )
+        self._study_storage = None
 
     async def initialize(self):
         """Initialize tuner."""
         try:
             await self.evaluator.initialize()
+            self._load_score_cache()
+            
+            os.makedirs(os.path.dirname(self.results_path) or '.', exist_ok=True)
+            self._results_fp = open(self.results_path, 'ab')
+            self._study_storage = optuna.storages.RDBStorage(f"sqlite:///{self._study_storage_path}")
             self.logger.info("Hyperparameter tuner initialized")
         except Exception as e:
             self.logger.error(f"Failed to initialize tuner: {e}")
             raise
 
-    async def tune_yield_prediction_hyperparameters(self) -> Dict[str, Any]:
-        """Tune hyperparameters for yield prediction model."""
+    def _cache_key(self, model_key: str, config: Dict[str, Any]) -> str:
+        """Build a score-cache key that changes when the underlying Gemini model does."""
+        values = ':'.join(str(config[name]) for name in PARAM_NAMES)
+        return f"{model_key}:{self.config.get('GEMINI_MODEL', 'gemini-pro')}:{values}"
+
+    def _load_score_cache(self):
+        """Load previously evaluated configuration scores from disk."""
         try:
-            self.logger.info("Starting yield prediction hyperparameter tuning")
-            
-            best_config = None
-            best_score = -float('inf')
-            all_results = []
-            
-            # Get parameter combinations
-            param_space = self.hyperparameter_spaces['yield_prediction']
-            param_combinations = list(itertools.product(
-                param_space['temperature'],
-                param_space['max_output_tokens'],
-                param_space['top_p'],
-                param_space['top_k']
-            ))
-            
-            # Test each combination
-            for i, (temperature, max_tokens, top_p, top_k) in enumerate(param_combinations):
-                self.logger.info(f"Testing configuration {i+1}/{len(param_combinations)}")
-                
-                # Create configuration
-                config = {
-                    'temperature': temperature,
-                    'max_output_tokens': max_tokens,
-                    'top_p': top_p,
-                    'top_k': top_k
-                }
-                
-                # Evaluate configuration
-                score, metrics = await self._evaluate_yield_prediction_config(config)
-                
-                result = {
-                    'configuration': config,
-                    'score': score,
-                    'metrics': metrics
-                }
-                all_results.append(result)
-                
-                # Track best configuration
-                if score > best_score:
-                    best_score = score
-                    best_config = config
-                
-                self.logger.info(f"Configuration score: {score:.4f}")
-            
-            tuning_results = {
-                'model': 'yield_prediction',
-                'best_configuration': best_config,
-                'best_score': best_score,
-                'total_configurations_tested': len(param_combinations),
-                'all_results': all_results,
-                'tuning_timestamp': datetime.now().isoformat()
-            }
-            
-            self.logger.info(f"Yield prediction tuning completed. Best score: {best_score:.4f}")
-            return tuning_results
-            
+            if os.path.exists(self._score_cache_path):
+                with open(self._score_cache_path, 'r') as f:
+                    self._score_cache = {key: tuple(value) for key, value in json.load(f).items()}
+                self.logger.info(f"Loaded {len(self._score_cache)} cached tuning scores")
         except Exception as e:
-            self.logger.error(f"Error tuning yield prediction hyperparameters: {e}")
-            return {'error': str(e)}
+            self.logger.warning(f"Failed to load tuning score cache: {e}")
 
-    async def tune_risk_assessment_hyperparameters(self) -> Dict[str, Any]:
-        """Tune hyperparameters for risk assessment model."""
+    def _save_score_cache(self):
+        """Persist evaluated configuration scores for later runs."""
         try:
-            self.logger.info("Starting risk assessment hyperparameter tuning")
-            
-            best_config = None
-            best_score = -float('inf')
-            all_results = []
-            
-            # Get parameter combinations
-            param_space = self.hyperparameter_spaces['risk_assessment']
-            param_combinations = list(itertools.product(
-                param_space['temperature'],
-                param_space['max_output_tokens'],
-                param_space['top_p'],
-                param_space['top_k']
-            ))
-            
-            # Test each combination
-            for i, (temperature, max_tokens, top_p, top_k) in enumerate(param_combinations):
-                self.logger.info(f"Testing configuration {i+1}/{len(param_combinations)}")
-                
-                config = {
-                    'temperature': temperature,
-                    'max_output_tokens': max_tokens,
-                    'top_p': top_p,
-                    'top_k': top_k
-                }
-                
-                # Evaluate configuration
-                score, metrics = await self._evaluate_risk_assessment_config(config)
-                
-                result = {
-                    'configuration': config,
-                    'score': score,
-                    'metrics': metrics
-                }
-                all_results.append(result)
-                
-                if score > best_score:
-                    best_score = score
-                    best_config = config
-                
-                self.logger.info(f"Configuration score: {score:.4f}")
-            
-            tuning_results = {
-                'model': 'risk_assessment',
-                'best_configuration': best_config,
-                'best_score': best_score,
-                'total_configurations_tested': len(param_combinations),
-                'all_results': all_results,
-                'tuning_timestamp': datetime.now().isoformat()
-            }
-            
-            self.logger.info(f"Risk assessment tuning completed. Best score: {best_score:.4f}")
-            return tuning_results
-            
+            os.makedirs(os.path.dirname(self._score_cache_path) or '.', exist_ok=True)
+            with open(self._score_cache_path, 'w') as f:
+                json.dump(self._score_cache, f, default=str)
         except Exception as e:
-            self.logger.error(f"Error tuning risk assessment hyperparameters: {e}")
-            return {'error': str(e)}
+            self.logger.warning(f"Failed to save tuning score cache: {e}")
 
-    async def tune_portfolio_optimization_hyperparameters(self) -> Dict[str, Any]:
-        """Tune hyperparameters for portfolio optimization model."""
+    async def tune(self, model_key: str, sampler: str = 'tpe',
+                   n_trials: int = DEFAULT_TUNING_TRIALS) -> Dict[str, Any]:
+        """Tune hyperparameters for a model with the 'tpe' or exhaustive 'grid' sampler."""
+        model_label = model_key.replace('_', ' ')
         try:
-            self.logger.info("Starting portfolio optimization hyperparameter tuning")
-            
-            best_config = None
-            best_score = -float('inf')
-            all_results = []
-            
-            # Get parameter combinations
-            param_space = self.hyperparameter_spaces['portfolio_optimization']
-            param_combinations = list(itertools.product(
-                param_space['temperature'],
-                param_space['max_output_tokens'],
-                param_space['top_p'],
-                param_space['top_k']
-            ))
-            
-            # Limit combinations for efficiency (take every 2nd combination)
-            param_combinations = param_combinations[::2]
-            
-            for i, (temperature, max_tokens, top_p, top_k) in enumerate(param_combinations):
-                self.logger.info(f"Testing configuration {i+1}/{len(param_combinations)}")
-                
-                config = {
-                    'temperature': temperature,
-                    'max_output_tokens': max_tokens,
-                    'top_p': top_p,
-                    'top_k': top_k
-                }
-                
-                # Evaluate configuration
-                score, metrics = await self._evaluate_portfolio_optimization_config(config)
-                
-                result = {
-                    'configuration': config,
-                    'score': score,
-                    'metrics': metrics
-                }
-                all_results.append(result)
-                
-                if score > best_score:
-                    best_score = score
-                    best_config = config
-                
-                self.logger.info(f"Configuration score: {score:.4f}")
+            self.logger.info(f"Starting {model_label} hyperparameter tuning")
             
-            tuning_results = {
-                'model': 'portfolio_optimization',
-                'best_configuration': best_config,
-                'best_score': best_score,
-                'total_configurations_tested': len(param_combinations),
-                'all_results': all_results,
-                'tuning_timestamp': datetime.now().isoformat()
+            param_space = HYPERPARAMETER_SPACES[model_key]
+            evaluate_fn = self._evaluators[model_key]
+            distributions = {
+                name: optuna.distributions.CategoricalDistribution(values)
+                for name, values in param_space.items()
             }
             
-            self.logger.info(f"Portfolio optimization tuning completed. Best score: {best_score:.4f}")
-            return tuning_results
-            
-        except Exception as e:
-            self.logger.error(f"Error tuning portfolio optimization hyperparameters: {e}")
-            return {'error': str(e)}
-
-    async def tune_market_analysis_hyperparameters(self) -> Dict[str, Any]:
-        """Tune hyperparameters for market analysis model."""
-        try:
-            self.logger.info("Starting market analysis hyperparameter tuning")
-            
-            best_config = None
-            best_score = -float('inf')
-            all_results = []
-            
-            # Get parameter combinations
-            param_space = self.hyperparameter_spaces['market_analysis']
-            param_combinations = list(itertools.product(
-                param_space['temperature'],
-                param_space['max_output_tokens'],
-                param_space['top_p'],
-                param_space['top_k']
-            ))
-            
-            for i, (temperature, max_tokens, top_p, top_k) in enumerate(param_combinations):
-                self.logger.info(f"Testing configuration {i+1}/{len(param_combinations)}")
-                
-                config = {
-                    'temperature': temperature,
-                    'max_output_tokens': max_tokens,
-                    'top_p': top_p,
-                    'top_k': top_k
-                }
-                
-                # Evaluate configuration
-                score, metrics = await self._evaluate_market_analysis_config(config)
-                
-                result = {
-                    'configuration': config,
-                    'score': score,
-                    'metrics': metrics
-                }
-                all_results.append(result)
-                
-                if score > best_score:
-                    best_score = score
-                    best_config = config
+            if sampler == 'tpe':
+                study_sampler = optuna.samplers.TPESampler()
+            elif sampler == 'grid':
+                study_sampler = optuna.samplers.GridSampler(param_space)
+            else:
+                raise ValueError(f"Unsupported sampler: {sampler}")
+            
+            # Scores depend on the Gemini model, so each model gets its own history
+            gemini_model = self.config.get('GEMINI_MODEL', 'gemini-pro')
+            study = optuna.create_study(
+                study_name=f"flowbridge_{model_key}_{gemini_model}_{sampler}",
+                storage=self._study_storage,
+                load_if_exists=True,
+                direction='maximize',
+                sampler=study_sampler,
+                pruner=optuna.pruners.SuccessiveHalvingPruner(reduction_factor=3)
+            )
+            
+            # Re-check the previous best first; TPE already conditions on the loaded trials
+            previous_trials = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+            if previous_trials and sampler == 'tpe':
+                self.logger.info(
+                    f"Warm-starting from {len(previous_trials)} previous trials "
+                    f"(best score {study.best_value:.4f})"
+                )
+                study.enqueue_trial(study.best_params)
+            
+            # When the budget covers the whole space, evaluate every configuration
+            # exactly once instead of letting the sampler draw duplicates
+            combinations = _PARAM_COMBINATIONS[model_key]
+            if sampler == 'grid':
+                n_trials = len(combinations)
+            elif n_trials >= len(combinations):
+                n_trials = len(combinations)
+                for values in combinations:
+                    study.enqueue_trial(dict(zip(PARAM_NAMES, values)), skip_if_exists=True)
+            
+            # Ask for one batch of trials at a time and evaluate the batch concurrently,
+            # so the sampler still learns from completed batches
+            for batch_start in range(0, n_trials, self.concurrency):
+                batch_size = min(self.concurrency, n_trials - batch_start)
+                self.logger.info(
+                    f"Testing configurations {batch_start+1}-{batch_start+batch_size}/{n_trials}"
+                )
+                
+                trials = [study.ask(distributions) for _ in range(batch_size)]
+                configs = [dict(trial.params) for trial in trials]
+                
+                # Evaluate configurations
+                outcomes = await asyncio.gather(
+                    *(self._run_trial(evaluate_fn, config, trial) for trial, config in zip(trials, configs))
+                )
+                
+                for trial, config, (score, metrics) in zip(trials, configs, outcomes):
+                    if score is None:
+                        study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+                        self.logger.info("Configuration pruned")
+                    else:
+                        study.tell(trial, score)
+                        self.logger.info(f"Configuration score: {score:.4f}")
+                    
+                    self._write_result({
+                        'model': model_key,
+                        'configuration': config,
+                        'score': score,
+                        'metrics': metrics
+                    })
                 
-                self.logger.info(f"Configuration score: {score:.4f}")
+                if self._results_fp:
+                    self._results_fp.flush()
+            
+            self._save_score_cache()
             
             tuning_results = {
-                'model': 'market_analysis',
-                'best_configuration': best_config,
-                'best_score': best_score,
-                'total_configurations_tested': len(param_combinations),
-                'all_results': all_results,
+                'model': model_key,
+                'best_configuration': study.best_params,
+                'best_score': study.best_value,
+                'total_configurations_tested': n_trials,
+                'results_path': self.results_path,
                 'tuning_timestamp': datetime.now().isoformat()
             }
             
-            self.logger.info(f"Market analysis tuning completed. Best score: {best_score:.4f}")
+            self.logger.info(f"{model_label.capitalize()} tuning completed. Best score: {study.best_value:.4f}")
             return tuning_results
             
         except Exception as e:
-            self.logger.error(f"Error tuning market analysis hyperparameters: {e}")
+            self.logger.error(f"Error tuning {model_label} hyperparameters: {e}")
             return {'error': str(e)}
 
-    async def _evaluate_yield_prediction_config(self, config: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+    def _write_result(self, result: Dict[str, Any]):
+        """Append one trial result to the JSONL results file."""
+        if self._results_fp:
+            self._results_fp.write(safe_json_dumps(result) + b'\n')
+
+    async def _run_trial(self, evaluate_fn: Callable[[Dict[str, Any]], Awaitable[Tuple[float, Dict[str, Any]]]],
+                         config: Dict[str, Any], trial: optuna.Trial) -> Tuple[Optional[float], Dict[str, Any]]:
+        """Evaluate one configuration while holding a concurrency slot; a None score means pruned."""
+        async with self._sem:
+            try:
+                return await evaluate_fn(config, trial)
+            except optuna.TrialPruned:
+                return None, {'pruned': True}
+
+    async def _call_model(self, method: Callable[..., Any], *args, **kwargs) -> Tuple[Any, float]:
+        """Run a blocking model call under the rate limiter, retrying with backoff on 429s.
+
+        Returns the result and the response time of the successful attempt only.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await self._limiter.acquire()
+            throttled = False
+            try:
+                start_time = time.perf_counter()
+                result = await asyncio.to_thread(method, *args, **kwargs)
+                return result, time.perf_counter() - start_time
+            except google_exceptions.ResourceExhausted:
+                throttled = True
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+            finally:
+                await self._limiter.release(throttled)
+
+            delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+            self.logger.warning(f"Gemini rate limit hit, retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+    async def tune_yield_prediction_hyperparameters(self) -> Dict[str, Any]:
+        """Tune hyperparameters for yield prediction model."""
+        return await self.tune('yield_prediction')
+
+    async def tune_risk_assessment_hyperparameters(self) -> Dict[str, Any]:
+        """Tune hyperparameters for risk assessment model."""
+        return await self.tune('risk_assessment')
+
+    async def tune_portfolio_optimization_hyperparameters(self) -> Dict[str, Any]:
+        """Tune hyperparameters for portfolio optimization model."""
+        return await self.tune('portfolio_optimization')
+
+    async def tune_market_analysis_hyperparameters(self) -> Dict[str, Any]:
+        """Tune hyperparameters for market analysis model."""
+        return await self.tune('market_analysis')
+
+    @cached_eval('yield_prediction')
+    async def _evaluate_yield_prediction_config(self, config: Dict[str, Any],
+                                                trial: Optional[optuna.Trial] = None) -> Tuple[float, Dict[str, Any]]:
         """Evaluate a specific configuration for yield prediction."""
         try:
-            # Create model with specific configuration
-            yield_predictor = YieldPredictor()
-            
             # Test with sample data
             test_protocols = [
                 {
@@ -335,30 +438,33 @@ class HyperparameterTuner:
                 }
             ]
             
-            predictions = []
-            confidences = []
-            response_times = []
+            # Columns: predicted APY, confidence, response time
+            samples = np.empty((len(test_protocols), 3), dtype=np.float64)
             
-            for protocol in test_protocols:
-                start_time = datetime.now()
+            for step, protocol in enumerate(test_protocols):
                 try:
-                    prediction = yield_predictor.predict_yield(protocol, 7)
-                    end_time = datetime.now()
-                    
-                    response_time = (end_time - start_time).total_seconds()
+                    prediction, response_time = await self._call_model(
+                        self._yield_predictor.predict_yield, protocol, 7, generation_config=config
+                    )
                     
-                    predictions.append(prediction.predicted_apy)
-                    confidences.append(prediction.confidence)
-                    response_times.append(response_time)
+                    samples[step] = (prediction.predicted_apy, prediction.confidence, response_time)
                     
                 except Exception as e:
                     self.logger.warning(f"Prediction failed for config: {e}")
                     return 0.0, {'error': str(e)}
+                
+                # Consistency needs several samples, so assume it is perfect until then
+                running_means = samples[:step + 1].mean(axis=0)
+                _report_progress(trial, step, (
+                    running_means[1] * 0.5 +
+                    max(0, 1 - running_means[2] / 10) * 0.3 + 0.2
+                ))
             
             # Calculate score based on multiple factors
-            avg_confidence = np.mean(confidences) if confidences else 0
-            avg_response_time = np.mean(response_times) if response_times else 10
-            prediction_variance = np.std(predictions) if len(predictions) > 1 else 0
+            means = samples.mean(axis=0)
+            stds = samples.std(axis=0)
+            _, avg_confidence, avg_response_time = means
+            prediction_variance = stds[0] if len(samples) > 1 else 0
             
             # Scoring: prioritize high confidence, low response time, reasonable variance
             confidence_score = avg_confidence
@@ -371,19 +477,21 @@ class HyperparameterTuner:
                 'average_confidence': float(avg_confidence),
                 'average_response_time': float(avg_response_time),
                 'prediction_variance': float(prediction_variance),
-                'predictions_count': len(predictions)
+                'predictions_count': len(samples)
             }
             
             return float(overall_score), metrics
             
+        except optuna.TrialPruned:
+            raise
         except Exception as e:
             return 0.0, {'error': str(e)}
 
-    async def _evaluate_risk_assessment_config(self, config: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+    @cached_eval('risk_assessment')
+    async def _evaluate_risk_assessment_config(self, config: Dict[str, Any],
+                                               trial: Optional[optuna.Trial] = None) -> Tuple[float, Dict[str, Any]]:
         """Evaluate a specific configuration for risk assessment."""
         try:
-            risk_assessor = RiskAssessor()
-            
             # Test with sample portfolios
             test_portfolios = [
                 {
@@ -401,30 +509,32 @@ class HyperparameterTuner:
                 }
             ]
             
-            assessments = []
-            confidences = []
-            response_times = []
+            # Columns: risk score, confidence, response time
+            samples = np.empty((len(test_portfolios), 3), dtype=np.float64)
             
-            for portfolio in test_portfolios:
-                start_time = datetime.now()
+            for step, portfolio in enumerate(test_portfolios):
                 try:
-                    assessment = risk_assessor.assess_portfolio_risk(portfolio)
-                    end_time = datetime.now()
+                    assessment, response_time = await self._call_model(
+                        self._risk_assessor.assess_portfolio_risk, portfolio, generation_config=config
+                    )
                     
-                    response_time = (end_time - start_time).total_seconds()
-                    
-                    assessments.append(assessment.overall_risk_score)
-                    confidences.append(assessment.confidence)
-                    response_times.append(response_time)
+                    samples[step] = (assessment.overall_risk_score, assessment.confidence, response_time)
                     
                 except Exception as e:
                     self.logger.warning(f"Risk assessment failed for config: {e}")
                     return 0.0, {'error': str(e)}
+                
+                running_means = samples[:step + 1].mean(axis=0)
+                _report_progress(trial, step, (
+                    running_means[1] * 0.4 +
+                    max(0, 1 - running_means[2] / 10) * 0.3 + 0.3
+                ))
             
             # Calculate score
-            avg_confidence = np.mean(confidences) if confidences else 0
-            avg_response_time = np.mean(response_times) if response_times else 10
-            assessment_consistency = 1 - (np.std(assessments) / 10) if len(assessments) > 1 else 1
+            means = samples.mean(axis=0)
+            stds = samples.std(axis=0)
+            _, avg_confidence, avg_response_time = means
+            assessment_consistency = 1 - (stds[0] / 10) if len(samples) > 1 else 1
             
             confidence_score = avg_confidence
             speed_score = max(0, 1 - avg_response_time / 10)
@@ -436,19 +546,21 @@ class HyperparameterTuner:
                 'average_confidence': float(avg_confidence),
                 'average_response_time': float(avg_response_time),
                 'assessment_consistency': float(assessment_consistency),
-                'assessments_count': len(assessments)
+                'assessments_count': len(samples)
             }
             
             return float(overall_score), metrics
             
+        except optuna.TrialPruned:
+            raise
         except Exception as e:
             return 0.0, {'error': str(e)}
 
-    async def _evaluate_portfolio_optimization_config(self, config: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+    @cached_eval('portfolio_optimization')
+    async def _evaluate_portfolio_optimization_config(self, config: Dict[str, Any],
+                                                      trial: Optional[optuna.Trial] = None) -> Tuple[float, Dict[str, Any]]:
         """Evaluate a specific configuration for portfolio optimization."""
         try:
-            portfolio_optimizer = PortfolioOptimizer()
-            
             # Test with sample portfolio data
             test_data = {
                 'total_value': 10000,
@@ -462,12 +574,11 @@ class HyperparameterTuner:
             
             preferences = {'risk_tolerance': 5, 'optimization_target': 'balanced'}
             
-            start_time = datetime.now()
             try:
-                optimization = portfolio_optimizer.optimize_portfolio(test_data, preferences)
-                end_time = datetime.now()
-                
-                response_time = (end_time - start_time).total_seconds()
+                optimization, response_time = await self._call_model(
+                    self._portfolio_optimizer.optimize_portfolio, test_data, preferences,
+                    generation_config=config
+                )
                 
                 # Score based on optimization quality
                 sharpe_ratio = optimization.sharpe_ratio
@@ -500,11 +611,11 @@ class HyperparameterTuner:
         except Exception as e:
             return 0.0, {'error': str(e)}
 
-    async def _evaluate_market_analysis_config(self, config: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+    @cached_eval('market_analysis')
+    async def _evaluate_market_analysis_config(self, config: Dict[str, Any],
+                                               trial: Optional[optuna.Trial] = None) -> Tuple[float, Dict[str, Any]]:
         """Evaluate a specific configuration for market analysis."""
         try:
-            market_analyzer = MarketAnalyzer()
-            
             # Test with sample market data
             test_market_data = {
                 'total_market_cap': 2500000000000,
@@ -515,12 +626,11 @@ class HyperparameterTuner:
                 'fear_greed_index': 65
             }
             
-            start_time = datetime.now()
             try:
-                analysis = market_analyzer.analyze_market_conditions(test_market_data)
-                end_time = datetime.now()
-                
-                response_time = (end_time - start_time).total_seconds()
+                analysis, response_time = await self._call_model(
+                    self._market_analyzer.analyze_market_conditions, test_market_data,
+                    generation_config=config
+                )
                 
                 # Score based on analysis quality
                 confidence = analysis.confidence
@@ -555,11 +665,19 @@ class HyperparameterTuner:
         try:
             self.logger.info("Starting comprehensive hyperparameter tuning")
             
+            # The tuners are independent; the shared semaphore and rate limiter
+            # keep their combined Gemini traffic bounded
+            model_keys = ('yield_prediction', 'risk_assessment', 'portfolio_optimization', 'market_analysis')
+            results = await asyncio.gather(
+                self.tune_yield_prediction_hyperparameters(),
+                self.tune_risk_assessment_hyperparameters(),
+                self.tune_portfolio_optimization_hyperparameters(),
+                self.tune_market_analysis_hyperparameters(),
+                return_exceptions=True
+            )
             tuning_results = {
-                'yield_prediction': await self.tune_yield_prediction_hyperparameters(),
-                'risk_assessment': await self.tune_risk_assessment_hyperparameters(),
-                'portfolio_optimization': await self.tune_portfolio_optimization_hyperparameters(),
-                'market_analysis': await self.tune_market_analysis_hyperparameters()
+                model: {'error': str(result)} if isinstance(result, Exception) else result
+                for model, result in zip(model_keys, results)
             }
             
             # Generate summary
@@ -581,7 +699,8 @@ class HyperparameterTuner:
                     for model, result in tuning_results.items()
                     if 'error' not in result
                 },
-                'detailed_results': tuning_results
+                'detailed_results': tuning_results,
+                'detailed_results_path': self.results_path
             }
             
             self.logger.info("Comprehensive hyperparameter tuning completed")
@@ -595,6 +714,9 @@ class HyperparameterTuner:
         """Cleanup resources."""
         try:
             await self.evaluator.cleanup()
+            if self._results_fp:
+                self._results_fp.close()
+                self._results_fp = None
             self.logger.info("Hyperparameter tuner cleanup completed")
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
@@ -610,7 +732,7 @@ async def main():
         results = await tuner.run_comprehensive_tuning()
         
         print("Hyperparameter Tuning Results:")
-        print(json.dumps(results, indent=2, default=str))
+        print(safe_json_dumps(results, indent=True).decode('utf-8'))
         
     except Exception as e:
         print(f"Hyperparameter tuning failed: {e}")
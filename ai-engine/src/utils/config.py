@@ -1,7 +1,10 @@
 import os
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import functools
+from types import MappingProxyType
+from urllib.parse import unquote, urlsplit
+from typing import Dict, Any, Optional, List, Mapping
 from dataclasses import dataclass
 
 @dataclass
@@ -28,12 +31,99 @@ class GeminiConfig:
     max_output_tokens: int = 1024
     timeout: int = 30
 
+SENSITIVE_KEYS = frozenset({
+    'GEMINI_API_KEY', 'DB_PASSWORD', 'REDIS_PASSWORD',
+    'SECRET_KEY', 'COINGECKO_API_KEY', 'DEFILLAMA_API_KEY',
+    'DATABASE_URL', 'VALID_API_KEYS'
+})
+
+@functools.lru_cache(maxsize=1)
+def _parse_env() -> Mapping[str, Any]:
+    """Read and convert configuration environment variables once per process."""
+    config = {}
+    
+    # Environment
+    config['ENVIRONMENT'] = os.getenv('ENVIRONMENT', 'development')
+    config['DEBUG'] = os.getenv('DEBUG', 'false').lower() == 'true'
+    
+    # Flask/API
+    config['HOST'] = os.getenv('HOST', '0.0.0.0')
+    config['PORT'] = int(os.getenv('PORT', 5000))
+    config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    
+    # Database
+    config['DATABASE_URL'] = os.getenv('DATABASE_URL')
+    config['DB_HOST'] = os.getenv('DB_HOST', 'localhost')
+    config['DB_PORT'] = int(os.getenv('DB_PORT', 5432))
+    config['DB_USER'] = os.getenv('DB_USER', 'flowbridge')
+    config['DB_PASSWORD'] = os.getenv('DB_PASSWORD', '')
+    config['DB_NAME'] = os.getenv('DB_NAME', 'flowbridge_ai')
+    config['DB_SSL'] = os.getenv('DB_SSL', 'false').lower() == 'true'
+    
+    # Redis
+    config['REDIS_URL'] = os.getenv('REDIS_URL', 'redis://localhost:6379')
+    config['REDIS_HOST'] = os.getenv('REDIS_HOST', 'localhost')
+    config['REDIS_PORT'] = int(os.getenv('REDIS_PORT', 6379))
+    config['REDIS_PASSWORD'] = os.getenv('REDIS_PASSWORD')
+    config['REDIS_DB'] = int(os.getenv('REDIS_DB', 0))
+    
+    # AI/ML Configuration
+    config['GEMINI_API_KEY'] = os.getenv('GEMINI_API_KEY')
+    config['GEMINI_MODEL'] = os.getenv('GEMINI_MODEL', 'gemini-pro')
+    config['AI_TEMPERATURE'] = float(os.getenv('AI_TEMPERATURE', 0.3))
+    config['AI_MAX_TOKENS'] = int(os.getenv('AI_MAX_TOKENS', 1024))
+    config['AI_TIMEOUT'] = int(os.getenv('AI_TIMEOUT', 30))
+    
+    # External APIs
+    config['COINGECKO_API_KEY'] = os.getenv('COINGECKO_API_KEY')
+    config['DEFILLAMA_API_KEY'] = os.getenv('DEFILLAMA_API_KEY')
+    
+    # CORS
+    cors_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000')
+    config['ALLOWED_ORIGINS'] = [origin.strip() for origin in cors_origins.split(',')]
+    
+    # API Keys for validation
+    api_keys = os.getenv('VALID_API_KEYS', '')
+    config['VALID_API_KEYS'] = [key.strip() for key in api_keys.split(',') if key.strip()]
+    
+    # Logging
+    config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO')
+    config['LOG_FILE'] = os.getenv('LOG_FILE', 'ai_engine.log')
+    
+    # Model Training
+    config['MODEL_CACHE_DIR'] = os.getenv('MODEL_CACHE_DIR', './models')
+    config['DATA_CACHE_TTL'] = int(os.getenv('DATA_CACHE_TTL', 3600))
+    
+    # Rate Limiting
+    config['RATE_LIMIT_REQUESTS'] = int(os.getenv('RATE_LIMIT_REQUESTS', 100))
+    config['RATE_LIMIT_WINDOW'] = int(os.getenv('RATE_LIMIT_WINDOW', 3600))
+    
+    return MappingProxyType(config)
+
+def _parse_database_url(url: str) -> Optional[DatabaseConfig]:
+    """Parse a postgres DATABASE_URL, or return None if it is not one."""
+    parts = urlsplit(url)
+    
+    # Accept driver variants such as postgresql+asyncpg://
+    if not parts.scheme.startswith('postgres') or not parts.hostname:
+        return None
+    
+    return DatabaseConfig(
+        host=parts.hostname,
+        port=parts.port or 5432,
+        username=unquote(parts.username or ''),
+        password=unquote(parts.password or ''),
+        database=parts.path.lstrip('/'),
+        ssl_mode=True
+    )
+
 class Config:
     """Configuration management for the AI engine."""
     
     def __init__(self, config_file: Optional[str] = None):
         self.logger = logging.getLogger(__name__)
         self._config = {}
+        self._safe_config = None
         self._load_environment_variables()
         
         if config_file and os.path.exists(config_file):
@@ -43,61 +133,11 @@ class Config:
 
     def _load_environment_variables(self):
         """Load configuration from environment variables."""
-        # Environment
-        self._config['ENVIRONMENT'] = os.getenv('ENVIRONMENT', 'development')
-        self._config['DEBUG'] = os.getenv('DEBUG', 'false').lower() == 'true'
-        
-        # Flask/API
-        self._config['HOST'] = os.getenv('HOST', '0.0.0.0')
-        self._config['PORT'] = int(os.getenv('PORT', 5000))
-        self._config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-        
-        # Database
-        self._config['DATABASE_URL'] = os.getenv('DATABASE_URL')
-        self._config['DB_HOST'] = os.getenv('DB_HOST', 'localhost')
-        self._config['DB_PORT'] = int(os.getenv('DB_PORT', 5432))
-        self._config['DB_USER'] = os.getenv('DB_USER', 'flowbridge')
-        self._config['DB_PASSWORD'] = os.getenv('DB_PASSWORD', '')
-        self._config['DB_NAME'] = os.getenv('DB_NAME', 'flowbridge_ai')
-        self._config['DB_SSL'] = os.getenv('DB_SSL', 'false').lower() == 'true'
-        
-        # Redis
-        self._config['REDIS_URL'] = os.getenv('REDIS_URL', 'redis://localhost:6379')
-        self._config['REDIS_HOST'] = os.getenv('REDIS_HOST', 'localhost')
-        self._config['REDIS_PORT'] = int(os.getenv('REDIS_PORT', 6379))
-        self._config['REDIS_PASSWORD'] = os.getenv('REDIS_PASSWORD')
-        self._config['REDIS_DB'] = int(os.getenv('REDIS_DB', 0))
-        
-        # AI/ML Configuration
-        self._config['GEMINI_API_KEY'] = os.getenv('GEMINI_API_KEY')
-        self._config['GEMINI_MODEL'] = os.getenv('GEMINI_MODEL', 'gemini-pro')
-        self._config['AI_TEMPERATURE'] = float(os.getenv('AI_TEMPERATURE', 0.3))
-        self._config['AI_MAX_TOKENS'] = int(os.getenv('AI_MAX_TOKENS', 1024))
-        self._config['AI_TIMEOUT'] = int(os.getenv('AI_TIMEOUT', 30))
-        
-        # External APIs
-        self._config['COINGECKO_API_KEY'] = os.getenv('COINGECKO_API_KEY')
-        self._config['DEFILLAMA_API_KEY'] = os.getenv('DEFILLAMA_API_KEY')
-        
-        # CORS
-        cors_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000')
-        self._config['ALLOWED_ORIGINS'] = [origin.strip() for origin in cors_origins.split(',')]
-        
-        # API Keys for validation
-        api_keys = os.getenv('VALID_API_KEYS', '')
-        self._config['VALID_API_KEYS'] = [key.strip() for key in api_keys.split(',') if key.strip()]
-        
-        # Logging
-        self._config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO')
-        self._config['LOG_FILE'] = os.getenv('LOG_FILE', 'ai_engine.log')
-        
-        # Model Training
-        self._config['MODEL_CACHE_DIR'] = os.getenv('MODEL_CACHE_DIR', './models')
-        self._config['DATA_CACHE_TTL'] = int(os.getenv('DATA_CACHE_TTL', 3600))
-        
-        # Rate Limiting
-        self._config['RATE_LIMIT_REQUESTS'] = int(os.getenv('RATE_LIMIT_REQUESTS', 100))
-        self._config['RATE_LIMIT_WINDOW'] = int(os.getenv('RATE_LIMIT_WINDOW', 3600))
+        # Lists are copied so instances never share mutable values
+        self._config.update(
+            (key, list(value) if isinstance(value, list) else value)
+            for key, value in _parse_env().items()
+        )
 
     def _load_config_file(self, config_file: str):
         """Load configuration from JSON file."""
@@ -105,6 +145,7 @@ class Config:
             with open(config_file, 'r') as f:
                 file_config = json.load(f)
                 self._config.update(file_config)
+                self._invalidate_derived_config()
             self.logger.info(f"Loaded configuration from {config_file}")
         except Exception as e:
             self.logger.warning(f"Failed to load config file {config_file}: {e}")
@@ -130,28 +171,21 @@ class Config:
     def set(self, key: str, value: Any):
         """Set configuration value."""
         self._config[key] = value
+        self._invalidate_derived_config()
 
-    def get_database_config(self) -> DatabaseConfig:
-        """Get database configuration."""
+    def _invalidate_derived_config(self):
+        """Drop cached config objects so they are rebuilt from current values."""
+        self._safe_config = None
+        for name in ('database_config', 'redis_config', 'gemini_config'):
+            self.__dict__.pop(name, None)
+
+    @functools.cached_property
+    def database_config(self) -> DatabaseConfig:
+        """Database configuration, built on first access."""
         if self._config.get('DATABASE_URL'):
-            # Parse DATABASE_URL if provided
-            url = self._config['DATABASE_URL']
-            # This is a simplified parser - in production, use urllib.parse
-            if 'postgresql://' in url or 'postgres://' in url:
-                parts = url.replace('postgresql://', '').replace('postgres://', '').split('@')
-                if len(parts) == 2:
-                    user_pass = parts[0].split(':')
-                    host_port_db = parts[1].split('/')
-                    host_port = host_port_db[0].split(':')
-                    
-                    return DatabaseConfig(
-                        host=host_port[0],
-                        port=int(host_port[1]) if len(host_port) > 1 else 5432,
-                        username=user_pass[0],
-                        password=user_pass[1] if len(user_pass) > 1 else '',
-                        database=host_port_db[1] if len(host_port_db) > 1 else '',
-                        ssl_mode=True
-                    )
+            db_config = _parse_database_url(self._config['DATABASE_URL'])
+            if db_config is not None:
+                return db_config
         
         return DatabaseConfig(
             host=self._config['DB_HOST'],
@@ -162,8 +196,9 @@ class Config:
             ssl_mode=self._config['DB_SSL']
         )
 
-    def get_redis_config(self) -> RedisConfig:
-        """Get Redis configuration."""
+    @functools.cached_property
+    def redis_config(self) -> RedisConfig:
+        """Redis configuration, built on first access."""
         return RedisConfig(
             host=self._config['REDIS_HOST'],
             port=self._config['REDIS_PORT'],
@@ -171,8 +206,9 @@ class Config:
             database=self._config['REDIS_DB']
         )
 
-    def get_gemini_config(self) -> GeminiConfig:
-        """Get Gemini AI configuration."""
+    @functools.cached_property
+    def gemini_config(self) -> GeminiConfig:
+        """Gemini AI configuration, built on first access."""
         return GeminiConfig(
             api_key=self._config['GEMINI_API_KEY'],
             model_name=self._config['GEMINI_MODEL'],
@@ -181,6 +217,18 @@ class Config:
             timeout=self._config['AI_TIMEOUT']
         )
 
+    def get_database_config(self) -> DatabaseConfig:
+        """Get database configuration."""
+        return self.database_config
+
+    def get_redis_config(self) -> RedisConfig:
+        """Get Redis configuration."""
+        return self.redis_config
+
+    def get_gemini_config(self) -> GeminiConfig:
+        """Get Gemini AI configuration."""
+        return self.gemini_config
+
     def is_development(self) -> bool:
         """Check if running in development environment."""
         return self._config['ENVIRONMENT'] == 'development'
@@ -215,23 +263,20 @@ class Config:
     def update_from_dict(self, config_dict: Dict[str, Any]):
         """Update configuration from dictionary."""
         self._config.update(config_dict)
+        self._invalidate_derived_config()
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary (excluding sensitive data)."""
-        safe_config = self._config.copy()
-        
-        # Remove sensitive information
-        sensitive_keys = [
-            'GEMINI_API_KEY', 'DB_PASSWORD', 'REDIS_PASSWORD', 
-            'SECRET_KEY', 'COINGECKO_API_KEY', 'DEFILLAMA_API_KEY',
-            'DATABASE_URL', 'VALID_API_KEYS'
-        ]
-        
-        for key in sensitive_keys:
-            if key in safe_config:
-                safe_config[key] = '[REDACTED]'
+        # The redacted view is cached until the configuration changes
+        if self._safe_config is None:
+            # Remove sensitive information
+            self._safe_config = {
+                key: '[REDACTED]' if key in SENSITIVE_KEYS else value
+                for key, value in self._config.items()
+            }
         
-        return safe_config
+        # Each caller gets its own copy, so mutating it can't leak into later calls
+        return dict(self._safe_config)
 
 # Global configuration instance
 _config_instance = None
@@ -246,5 +291,7 @@ def get_config() -> Config:
 def init_config(config_file: Optional[str] = None) -> Config:
     """Initialize global configuration."""
     global _config_instance
+    if _config_instance is not None and config_file is None:
+        return _config_instance
     _config_instance = Config(config_file)
     return _config_instance
@@ -2,15 +2,29 @@ import asyncio
 import functools
 import hashlib
 import json
+import os
+import random
+import re
 import time
-from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 T = TypeVar('T')
 
+_ETH_ADDRESS_MATCH = re.compile(r'0x[0-9a-fA-F]{40}').fullmatch
+_monotonic = time.monotonic
+_jitter_random = random.Random().random
+_SANITIZE_TABLE = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' '})
+
 @dataclass
 class RetryConfig:
     max_attempts: int = 3
@@ -28,6 +42,7 @@ def retry_async(config: RetryConfig = None):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             last_exception = None
+            backoff = config.base_delay
             
             for attempt in range(config.max_attempts):
                 try:
@@ -39,15 +54,12 @@ def retry_async(config: RetryConfig = None):
                         raise
                     
                     # Calculate delay with exponential backoff
-                    delay = min(
-                        config.base_delay * (config.exponential_base ** attempt),
-                        config.max_delay
-                    )
+                    delay = min(backoff, config.max_delay)
+                    backoff *= config.exponential_base
                     
                     # Add jitter to prevent thundering herd
                     if config.jitter:
-                        import random
-                        delay = delay * (0.5 + 0.5 * random.random())
+                        delay *= 0.5 + 0.5 * _jitter_random()
                     
                     await asyncio.sleep(delay)
             
@@ -92,7 +104,9 @@ async def timeout_handler(coro, timeout_seconds: float):
 
 def validate_required_fields(data: Dict[str, Any], required_fields: List[str]) -> None:
     """Validate that required fields are present in data."""
-    missing_fields = [field for field in required_fields if field not in data or data[field] is None]
+    # A missing key and an explicit None both read as None: one lookup per field
+    data_get = data.get
+    missing_fields = [field for field in required_fields if data_get(field) is None]
     
     if missing_fields:
         raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
@@ -100,10 +114,26 @@ def validate_required_fields(data: Dict[str, Any], required_fields: List[str]) -
 def safe_json_loads(json_string: str, default: Any = None) -> Any:
     """Safely parse JSON string with default fallback."""
     try:
+        if orjson is not None:
+            return orjson.loads(json_string)
         return json.loads(json_string)
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
     except (json.JSONDecodeError, TypeError):
         return default
 
+def safe_json_dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to JSON bytes, preferring orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=str, option=option)
+        except TypeError:
+            # orjson rejects ints beyond 64 bits (e.g. wei amounts); json handles them
+            pass
+    return json.dumps(data, indent=2 if indent else None, default=str).encode('utf-8')
+
 def safe_float_conversion(value: Any, default: float = 0.0) -> float:
     """Safely convert value to float with default fallback."""
     try:
@@ -120,21 +150,23 @@ def safe_int_conversion(value: Any, default: int = 0) -> int:
 
 def generate_request_id() -> str:
     """Generate unique request ID."""
-    timestamp = str(time.time()).encode()
-    random_bytes = str(np.random.random()).encode()
-    return hashlib.md5(timestamp + random_bytes).hexdigest()[:12]
+    return os.urandom(6).hex()
 
 def sanitize_string(text: str, max_length: int = 1000) -> str:
     """Sanitize string input for logging and storage."""
     if not isinstance(text, str):
         text = str(text)
     
+    # Limit length first; the translation is one-to-one so only the kept part needs it
+    truncated = len(text) > max_length
+    if truncated:
+        text = text[:max_length]
+    
     # Remove or replace potentially dangerous characters
-    sanitized = text.replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
+    sanitized = text.translate(_SANITIZE_TABLE)
     
-    # Limit length
-    if len(sanitized) > max_length:
-        sanitized = sanitized[:max_length] + "..."
+    if truncated:
+        sanitized += "..."
     
     return sanitized.strip()
 
@@ -153,63 +185,69 @@ def calculate_moving_average(values: List[float], window: int) -> List[float]:
     if len(values) < window:
         return [sum(values) / len(values)] * len(values)
     
-    moving_averages = []
-    for i in range(len(values)):
-        if i < window - 1:
-            moving_averages.append(sum(values[:i+1]) / (i+1))
-        else:
-            moving_averages.append(sum(values[i-window+1:i+1]) / window)
+    # Window sums are differences of one running sum; the warm-up region
+    # averages over however many values are available so far
+    cumsum = np.cumsum(np.asarray(values, dtype=np.float64))
+    head = cumsum[:window - 1] / np.arange(1, window)
+    tail = (cumsum[window - 1:] - np.concatenate(([0.0], cumsum[:-window]))) / window
     
-    return moving_averages
+    return np.concatenate((head, tail)).tolist()
 
 def calculate_volatility(prices: List[float], window: int = 30) -> float:
     """Calculate price volatility (standard deviation of returns)."""
     if len(prices) < 2:
         return 0.0
     
-    returns = []
-    for i in range(1, len(prices)):
-        if prices[i-1] != 0:
-            returns.append((prices[i] - prices[i-1]) / prices[i-1])
+    prices_array = np.asarray(prices, dtype=np.float64)
+    previous = prices_array[:-1]
     
-    if not returns:
+    # Skip returns off a zero price
+    valid = previous != 0
+    returns = np.diff(prices_array)[valid] / previous[valid]
+    
+    if returns.size == 0:
         return 0.0
     
     # Use the last 'window' returns for calculation
-    recent_returns = returns[-window:] if len(returns) > window else returns
-    
-    return float(np.std(recent_returns))
+    return float(np.std(returns[-window:]))
 
 def normalize_data(data: List[float], method: str = 'minmax') -> List[float]:
     """Normalize data using specified method."""
     if not data:
         return []
     
-    data_array = np.array(data)
+    # One owned float buffer, normalized in place
+    data_array = np.array(data, dtype=np.float64)
     
     if method == 'minmax':
-        min_val = np.min(data_array)
-        max_val = np.max(data_array)
-        if max_val - min_val == 0:
+        min_val = data_array.min()
+        value_range = data_array.max() - min_val
+        if value_range == 0:
             return [0.5] * len(data)
-        return ((data_array - min_val) / (max_val - min_val)).tolist()
+        data_array -= min_val
+        data_array /= value_range
+        return data_array.tolist()
     
     elif method == 'zscore':
-        mean_val = np.mean(data_array)
-        std_val = np.std(data_array)
+        mean_val = data_array.mean()
+        std_val = data_array.std()
         if std_val == 0:
             return [0.0] * len(data)
-        return ((data_array - mean_val) / std_val).tolist()
+        data_array -= mean_val
+        data_array /= std_val
+        return data_array.tolist()
     
     else:
         raise ValueError(f"Unknown normalization method: {method}")
 
-def chunk_list(data: List[T], chunk_size: int) -> List[List[T]]:
-    """Split list into chunks of specified size."""
+def chunk_list(data: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    """Lazily split an iterable into chunks of specified size."""
     if chunk_size <= 0:
         raise ValueError("Chunk size must be positive")
     
-    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    # Plain function returning an iterator, so a bad chunk_size still raises eagerly
+    iterator = iter(data)
+    return iter(lambda: list(islice(iterator, chunk_size)), [])
 
 def merge_dicts(*dicts: Dict[str, Any]) -> Dict[str, Any]:
     """Merge multiple dictionaries, with later ones taking precedence."""
@@ -221,20 +259,27 @@ def merge_dicts(*dicts: Dict[str, Any]) -> Dict[str, Any]:
 
 def flatten_dict(d: Dict[str, Any], parent_key: str = '', separator: str = '.') -> Dict[str, Any]:
     """Flatten nested dictionary."""
-    items = []
+    result = {}
+    # A stack of item iterators keeps the same depth-first key order as recursion
+    stack = [(parent_key, iter(d.items()))]
     
-    for key, value in d.items():
-        new_key = f"{parent_key}{separator}{key}" if parent_key else key
-        
-        if isinstance(value, dict):
-            items.extend(flatten_dict(value, new_key, separator).items())
+    while stack:
+        prefix, items = stack[-1]
+        for key, value in items:
+            new_key = f"{prefix}{separator}{key}" if prefix else key
+            
+            if isinstance(value, dict):
+                stack.append((new_key, iter(value.items())))
+                break
+            
+            result[new_key] = value
         else:
-            items.append((new_key, value))
+            stack.pop()
     
-    return dict(items)
+    return result
 
-def paginate_list(data: List[T], page: int, page_size: int) -> Dict[str, Any]:
-    """Paginate a list and return pagination info."""
+def paginate_list(data: Sequence[T], page: int, page_size: int) -> Dict[str, Any]:
+    """Paginate a sequence and return pagination info."""
     if page < 1:
         page = 1
     
@@ -242,13 +287,14 @@ def paginate_list(data: List[T], page: int, page_size: int) -> Dict[str, Any]:
         page_size = 10
     
     total_items = len(data)
-    total_pages = (total_items + page_size - 1) // page_size
+    total_pages, remainder = divmod(total_items, page_size)
+    if remainder:
+        total_pages += 1
     
     start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
     
     return {
-        'data': data[start_idx:end_idx],
+        'data': data[start_idx:start_idx + page_size],
         'pagination': {
             'page': page,
             'page_size': page_size,
@@ -264,40 +310,33 @@ def calculate_sharpe_ratio(returns: List[float], risk_free_rate: float = 0.02) -
     if not returns:
         return 0.0
     
-    returns_array = np.array(returns)
-    excess_returns = returns_array - risk_free_rate / 252  # Daily risk-free rate
+    returns_array = np.asarray(returns, dtype=np.float64)
     
-    if len(excess_returns) == 0 or np.std(excess_returns) == 0:
+    # Subtracting a constant daily risk-free rate leaves the spread unchanged,
+    # so the excess-return array never needs to be materialized
+    std_val = returns_array.std()
+    if std_val == 0:
         return 0.0
     
-    return float(np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252))
+    excess_mean = returns_array.mean() - risk_free_rate / 252  # Daily risk-free rate
+    return float(excess_mean / std_val * np.sqrt(252))
 
 def calculate_max_drawdown(prices: List[float]) -> float:
     """Calculate maximum drawdown from price series."""
     if len(prices) < 2:
         return 0.0
     
-    prices_array = np.array(prices)
+    prices_array = np.asarray(prices, dtype=np.float64)
     peak = np.maximum.accumulate(prices_array)
-    drawdown = (prices_array - peak) / peak
     
-    return float(np.min(drawdown))
+    # (price - peak) / peak == price / peak - 1, computed in the peak buffer
+    np.divide(prices_array, peak, out=peak)
+    
+    return float(peak.min() - 1.0)
 
 def is_valid_ethereum_address(address: str) -> bool:
     """Validate Ethereum address format."""
-    if not isinstance(address, str):
-        return False
-    
-    # Basic format check
-    if not address.startswith('0x') or len(address) != 42:
-        return False
-    
-    # Check if all characters after '0x' are hexadecimal
-    try:
-        int(address[2:], 16)
-        return True
-    except ValueError:
-        return False
+    return isinstance(address, str) and _ETH_ADDRESS_MATCH(address) is not None
 
 def format_currency(amount: float, currency: str = 'USD', decimals: int = 2) -> str:
     """Format amount as currency string."""
@@ -313,37 +352,37 @@ def calculate_correlation(x: List[float], y: List[float]) -> float:
     if len(x) != len(y) or len(x) < 2:
         return 0.0
     
-    x_array = np.array(x)
-    y_array = np.array(y)
+    # Pearson r directly, rather than the full 2x2 np.corrcoef matrix
+    x_centered = np.asarray(x, dtype=np.float64)
+    x_centered = x_centered - x_centered.mean()
+    y_centered = np.asarray(y, dtype=np.float64)
+    y_centered = y_centered - y_centered.mean()
     
-    correlation_matrix = np.corrcoef(x_array, y_array)
-    return float(correlation_matrix[0, 1]) if not np.isnan(correlation_matrix[0, 1]) else 0.0
+    denominator = np.sqrt(np.dot(x_centered, x_centered) * np.dot(y_centered, y_centered))
+    if denominator == 0:
+        return 0.0
+    
+    correlation = np.dot(x_centered, y_centered) / denominator
+    return float(correlation) if not np.isnan(correlation) else 0.0
 
 def exponential_moving_average(values: List[float], alpha: float = 0.1) -> List[float]:
     """Calculate exponential moving average."""
     if not values or alpha <= 0 or alpha > 1:
         return []
     
-    ema = [values[0]]
-    
-    for i in range(1, len(values)):
-        ema_value = alpha * values[i] + (1 - alpha) * ema[i-1]
-        ema.append(ema_value)
-    
-    return ema
+    # adjust=False is exactly ema[i] = alpha * x[i] + (1 - alpha) * ema[i-1], seeded with x[0]
+    return pd.Series(values, dtype=np.float64).ewm(alpha=alpha, adjust=False).mean().tolist()
 
 def calculate_rsi(prices: List[float], period: int = 14) -> Optional[float]:
     """Calculate Relative Strength Index (RSI)."""
     if len(prices) < period + 1:
         return None
     
-    deltas = [prices[i] - prices[i-1] for i in range(1, len(prices))]
-    
-    gains = [delta if delta > 0 else 0 for delta in deltas[-period:]]
-    losses = [-delta if delta < 0 else 0 for delta in deltas[-period:]]
+    # Only the last 'period' deltas contribute
+    deltas = np.diff(np.asarray(prices[-(period + 1):], dtype=np.float64))
     
-    avg_gain = sum(gains) / period
-    avg_loss = sum(losses) / period
+    avg_gain = deltas[deltas > 0].sum() / period
+    avg_loss = -deltas[deltas < 0].sum() / period
     
     if avg_loss == 0:
         return 100.0
@@ -356,42 +395,68 @@ def calculate_rsi(prices: List[float], period: int = 14) -> Optional[float]:
 class CircuitBreaker:
     """Circuit breaker pattern implementation."""
     
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+    _STATE_NAMES = ('CLOSED', 'OPEN', 'HALF_OPEN')
+    
     def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60):
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.failure_count = 0
         self.last_failure_time = None
-        self.state = 'CLOSED'  # CLOSED, OPEN, HALF_OPEN
+        self._state = self.CLOSED
+    
+    @property
+    def state(self) -> str:
+        """Current state name: CLOSED, OPEN or HALF_OPEN."""
+        return self._STATE_NAMES[self._state]
     
     def call(self, func: Callable, *args, **kwargs):
         """Execute function with circuit breaker protection."""
-        if self.state == 'OPEN':
-            if time.time() - self.last_failure_time > self.recovery_timeout:
-                self.state = 'HALF_OPEN'
+        state = self._state
+        
+        if state == self.OPEN:
+            # Monotonic clock so wall-clock adjustments can't reopen or hold the breaker
+            if _monotonic() - self.last_failure_time > self.recovery_timeout:
+                state = self._state = self.HALF_OPEN
             else:
                 raise Exception("Circuit breaker is OPEN")
         
         try:
             result = func(*args, **kwargs)
             
-            if self.state == 'HALF_OPEN':
-                self.state = 'CLOSED'
+            if state == self.HALF_OPEN:
+                self._state = self.CLOSED
                 self.failure_count = 0
             
             return result
         
         except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
+            failure_count = self.failure_count + 1
+            self.failure_count = failure_count
+            self.last_failure_time = _monotonic()
             
-            if self.failure_count >= self.failure_threshold:
-                self.state = 'OPEN'
+            if failure_count >= self.failure_threshold:
+                self._state = self.OPEN
             
             raise
 
 def create_hash(data: Union[str, Dict, List]) -> str:
     """Create consistent hash for data."""
     if isinstance(data, (dict, list)):
-        data = json.dumps(data, sort_keys=True)
+        # Compact, sorted and non-ASCII-escaped either way; the two serializers still
+        # differ on NaN/Infinity (orjson writes null), so digests are per-backend there.
+        # Ints beyond 64 bits (e.g. wei amounts) make orjson raise, so those go through json
+        payload = None
+        if orjson is not None:
+            try:
+                payload = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass
+        if payload is None:
+            payload = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+    elif isinstance(data, str):
+        payload = data.encode()
+    else:
+        payload = str(data).encode()
     
-    return hashlib.sha256(str(data).encode()).hexdigest()
+    return hashlib.blake2b(payload, digest_size=32).hexdigest()
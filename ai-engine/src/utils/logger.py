@@ -1,17 +1,62 @@
+import atexit
+import functools
+import itertools
 import logging
 import logging.handlers
 import os
+import queue
+import stat
 import sys
-from datetime import datetime
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from typing import Optional
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps(obj) -> str:
+    """Serialize a log entry to a JSON string, preferring orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+_DEFAULT_FORMATTER = logging.Formatter()
+
+def _exception_text(formatter: logging.Formatter, record: logging.LogRecord) -> str:
+    """Formatted traceback, cached on the record like logging.Formatter.format does."""
+    if not record.exc_text:
+        record.exc_text = formatter.formatException(record.exc_info)
+    return record.exc_text
+
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
     
+    _EXTRA_FIELDS = ('user_id', 'request_id', 'execution_time')
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, formatted prefix) in one attribute so threads never see a torn pair
+        self._cached_second = (-1, '')
+    
+    def _format_timestamp(self, created: float) -> str:
+        """ISO-8601 UTC timestamp with milliseconds, reusing the per-second prefix."""
+        second = int(created)
+        cached_second, prefix = self._cached_second
+        if second != cached_second:
+            tm = time.gmtime(second)
+            prefix = f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+            self._cached_second = (second, prefix)
+        
+        return f"{prefix}.{int((created - second) * 1000):03d}Z"
+    
     def format(self, record):
         log_entry = {
-            'timestamp': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'timestamp': self._format_timestamp(record.created),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -20,21 +65,18 @@ class JSONFormatter(logging.Formatter):
             'line': record.lineno
         }
         
-        # Add extra fields if present
-        if hasattr(record, 'user_id'):
-            log_entry['user_id'] = record.user_id
-        
-        if hasattr(record, 'request_id'):
-            log_entry['request_id'] = record.request_id
-        
-        if hasattr(record, 'execution_time'):
-            log_entry['execution_time'] = record.execution_time
+        # Add extra fields if present; extras live in the record's __dict__
+        get_field = record.__dict__.get
+        for field in self._EXTRA_FIELDS:
+            value = get_field(field)
+            if value is not None:
+                log_entry[field] = value
         
         # Add exception info if present
         if record.exc_info:
-            log_entry['exception'] = self.formatException(record.exc_info)
+            log_entry['exception'] = _exception_text(self, record)
         
-        return json.dumps(log_entry)
+        return _dumps(log_entry)
 
 class ColoredFormatter(logging.Formatter):
     """Colored formatter for console output."""
@@ -48,22 +90,222 @@ class ColoredFormatter(logging.Formatter):
         'RESET': '\033[0m'      # Reset
     }
     
+    # "<color>[%s] LEVEL    " per level, so format() only substitutes the timestamp
+    _PREFIXES = {level: f"{color}[%s] {level:<8} " for level, color in COLORS.items() if level != 'RESET'}
+    _RESET = COLORS['RESET']
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = (-1, '')
+    
     def format(self, record):
-        color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
-        reset = self.COLORS['RESET']
-        
-        # Format timestamp
-        timestamp = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')
+        # Format timestamp, once per second
+        second = int(record.created)
+        cached_second, timestamp = self._cached_second
+        if second != cached_second:
+            tm = time.localtime(second)
+            timestamp = f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d} {tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+            self._cached_second = (second, timestamp)
         
         # Create colored log message
-        log_message = f"{color}[{timestamp}] {record.levelname:<8} {record.name}: {record.getMessage()}{reset}"
+        prefix = self._PREFIXES.get(record.levelname)
+        if prefix is not None:
+            prefix %= timestamp
+        else:
+            prefix = f"{self._RESET}[{timestamp}] {record.levelname:<8} "
+        
+        log_message = f"{prefix}{record.name}: {record.getMessage()}{self._RESET}"
         
         # Add exception info if present
         if record.exc_info:
-            log_message += f"\n{self.formatException(record.exc_info)}"
+            log_message += f"\n{_exception_text(self, record)}"
         
         return log_message
 
+class BytesStreamHandler(logging.StreamHandler):
+    """Stream handler that writes UTF-8 bytes to the stream's binary buffer when it has one."""
+    
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            stream = self.stream
+            buffer = getattr(stream, 'buffer', None)
+            
+            if buffer is None:
+                stream.write(msg)
+            else:
+                # Push out any text already pending in the wrapper so output stays ordered
+                stream.flush()
+                buffer.write(msg.encode('utf-8', 'replace'))
+            
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+def _periodic_flush(handler_ref: weakref.ref, closed: threading.Event, interval: float):
+    """Flush a handler every interval seconds until it is closed or garbage collected."""
+    while not closed.wait(interval):
+        handler = handler_ref()
+        if handler is None:
+            return
+        handler.flush()
+        del handler
+
+class FastRotatingFileHandler(logging.Handler):
+    """Size-rotating file handler that appends buffered bytes to a raw O_APPEND descriptor."""
+    
+    def __init__(self, filename: str, maxBytes: int = 0, backupCount: int = 0,
+                 buffer_size: int = 64 * 1024, flush_interval: Optional[float] = 0.5):
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self._fd = None
+        self._written = 0
+        self._rotatable = False
+        self._open()
+        
+        # Short bursts that never fill the buffer still reach disk within flush_interval
+        self._closed = threading.Event()
+        if flush_interval:
+            # The thread holds only a weakref so an unclosed, dropped handler can be collected
+            threading.Thread(
+                target=_periodic_flush,
+                args=(weakref.ref(self), self._closed, flush_interval),
+                name='log-flush',
+                daemon=True
+            ).start()
+    
+    def _open(self):
+        self._fd = os.open(self.baseFilename, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        file_stat = os.fstat(self._fd)
+        # Size is tracked from here on instead of calling tell() per record;
+        # never roll over anything other than regular files (bpo-45401)
+        self._written = file_stat.st_size
+        self._rotatable = self.maxBytes > 0 and self.backupCount > 0 and stat.S_ISREG(file_stat.st_mode)
+    
+    def handle(self, record):
+        """Format outside the handler lock; only buffering and writes are serialized."""
+        rv = self.filter(record)
+        if rv:
+            try:
+                data = (self.format(record) + '\n').encode('utf-8')
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+                return rv
+            
+            self.acquire()
+            try:
+                self._append(data)
+            except Exception:
+                self.handleError(record)
+            finally:
+                self.release()
+        return rv
+    
+    def emit(self, record):
+        try:
+            data = (self.format(record) + '\n').encode('utf-8')
+            self._append(data)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def _append(self, data: bytes):
+        # Reopen after close(), as FileHandler does
+        if self._fd is None:
+            self._open()
+        
+        self._buffer += data
+        self._written += len(data)
+        
+        if len(self._buffer) >= self.buffer_size:
+            self._write_buffer()
+        
+        if self._rotatable and self._written >= self.maxBytes:
+            self._rotate()
+    
+    def _write_buffer(self):
+        if not self._buffer or self._fd is None:
+            return
+        
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        
+        written = os.write(self._fd, data)
+        while written < len(data):
+            written += os.write(self._fd, data[written:])
+    
+    def _rotate(self):
+        self._write_buffer()
+        os.close(self._fd)
+        self._fd = None
+        
+        for i in range(self.backupCount - 1, 0, -1):
+            source = f"{self.baseFilename}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.baseFilename}.{i + 1}")
+        
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, f"{self.baseFilename}.1")
+        
+        self._open()
+    
+    def flush(self):
+        self.acquire()
+        try:
+            self._write_buffer()
+        finally:
+            self.release()
+    
+    def close(self):
+        self._closed.set()
+        self.acquire()
+        try:
+            if self._fd is not None:
+                self._write_buffer()
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+            super().close()
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that merges the message but keeps exception info for JSON output."""
+    
+    def prepare(self, record):
+        # Render on the caller's thread so later mutation of the args can't change
+        # the message; the traceback text is cached before exc_info is read elsewhere
+        if record.exc_info:
+            _exception_text(self.formatter or _DEFAULT_FORMATTER, record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def _skip_find_caller(stack_info: bool = False, stacklevel: int = 1):
+    """Stand-in for Logger.findCaller that reports an unknown source without walking frames."""
+    return "(unknown file)", 0, "(unknown function)", None
+
+@functools.lru_cache(maxsize=16)
+def _numeric_level(level: str) -> int:
+    """Map a level name such as 'info' to its logging constant, defaulting to INFO."""
+    return getattr(logging, level.upper(), logging.INFO)
+
+# Listeners started by setup_logger, stopped at exit before logging.shutdown() runs
+_queue_listeners = set()
+
+@atexit.register
+def _stop_queue_listeners():
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
 def setup_logger(
     name: str = 'ai_engine',
     level: str = 'INFO',
@@ -71,40 +313,59 @@ def setup_logger(
     enable_console: bool = True,
     enable_json: bool = False,
     max_bytes: int = 10 * 1024 * 1024,  # 10MB
-    backup_count: int = 5
+    backup_count: int = 5,
+    capture_source: Optional[bool] = None
 ) -> logging.Logger:
     """Setup logger with file and console handlers."""
     
     logger = logging.getLogger(name)
     
+    # Stop the previous listener so its handlers drain, then release their files
+    previous_listener = getattr(logger, '_queue_listener', None)
+    if previous_listener is not None and previous_listener in _queue_listeners:
+        _queue_listeners.discard(previous_listener)
+        previous_listener.stop()
+        for handler in previous_listener.handlers:
+            handler.close()
+    
     # Clear existing handlers
     logger.handlers.clear()
     
     # Set log level
-    numeric_level = getattr(logging, level.upper(), logging.INFO)
+    numeric_level = _numeric_level(level)
     logger.setLevel(numeric_level)
     
+    handlers = []
+    
     # Console handler
     if enable_console:
-        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler = BytesStreamHandler(sys.stdout)
+        
+        # Colors only for an interactive terminal, unless NO_COLOR is set
+        use_color = sys.stdout.isatty() and not os.environ.get('NO_COLOR')
         
         if enable_json:
             console_handler.setFormatter(JSONFormatter())
-        else:
+        elif use_color:
             console_handler.setFormatter(ColoredFormatter())
+        else:
+            console_handler.setFormatter(logging.Formatter(
+                '[%(asctime)s] %(levelname)-8s %(name)s: %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            ))
         
         console_handler.setLevel(numeric_level)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # File handler
     if log_file:
         # Ensure log directory exists
         log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
         
-        # Rotating file handler
-        file_handler = logging.handlers.RotatingFileHandler(
+        # Rotating file handler; logging.shutdown() flushes the buffer at exit
+        file_handler = FastRotatingFileHandler(
             log_file,
             maxBytes=max_bytes,
             backupCount=backup_count
@@ -113,7 +374,27 @@ def setup_logger(
         # Always use JSON format for file logs
         file_handler.setFormatter(JSONFormatter())
         file_handler.setLevel(numeric_level)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    # Callers only enqueue records; formatting and I/O run on the listener thread
+    if handlers:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _queue_listeners.add(listener)
+        
+        logger.addHandler(_RecordQueueHandler(log_queue))
+        logger._queue_listener = listener
+    
+    # Only JSON output (console or file) reports module/function/line; without it,
+    # skip the stack walk findCaller does for every record
+    if capture_source is None:
+        capture_source = enable_json or bool(log_file)
+    
+    if capture_source:
+        logger.__dict__.pop('findCaller', None)
+    else:
+        logger.findCaller = _skip_find_caller
     
     # Prevent duplicate logs
     logger.propagate = False
@@ -131,24 +412,24 @@ class RequestLogger:
                    request_id: Optional[str] = None):
         """Log HTTP request with context."""
         
+        level = logging.WARNING if status_code >= 400 else logging.INFO
+        if not self.logger.isEnabledFor(level):
+            return
+        
+        # One presized literal; absent optional fields are None, which JSONFormatter omits
         extra = {
             'execution_time': execution_time,
             'method': method,
             'path': path,
-            'status_code': status_code
+            'status_code': status_code,
+            'user_id': user_id or None,
+            'request_id': request_id or None
         }
         
-        if user_id:
-            extra['user_id'] = user_id
-        
-        if request_id:
-            extra['request_id'] = request_id
-        
-        level = logging.WARNING if status_code >= 400 else logging.INFO
-        
         self.logger.log(
             level,
-            f"{method} {path} - {status_code} - {execution_time:.3f}s",
+            "%s %s - %s - %.3fs",
+            method, path, status_code, execution_time,
             extra=extra
         )
 
@@ -163,20 +444,20 @@ class ModelLogger:
                       request_id: Optional[str] = None):
         """Log model prediction."""
         
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         extra = {
             'model_name': model_name,
             'input_size': input_size,
-            'execution_time': execution_time
+            'execution_time': execution_time,
+            'confidence': confidence,
+            'request_id': request_id or None
         }
         
-        if confidence is not None:
-            extra['confidence'] = confidence
-        
-        if request_id:
-            extra['request_id'] = request_id
-        
         self.logger.info(
-            f"Model {model_name} prediction completed - {execution_time:.3f}s",
+            "Model %s prediction completed - %.3fs",
+            model_name, execution_time,
             extra=extra
         )
     
@@ -186,14 +467,13 @@ class ModelLogger:
         
         extra = {
             'model_name': model_name,
-            'error_type': type(error).__name__
+            'error_type': error.__class__.__name__,
+            'request_id': request_id or None
         }
         
-        if request_id:
-            extra['request_id'] = request_id
-        
         self.logger.error(
-            f"Model {model_name} error: {str(error)}",
+            "Model %s error: %s",
+            model_name, error,
             extra=extra,
             exc_info=True
         )
@@ -203,43 +483,50 @@ class PerformanceLogger:
     
     def __init__(self, logger: logging.Logger):
         self.logger = logger
-        self.start_times = {}
+        # Oldest-first, so leaked timers (started but never ended) can be evicted
+        self.start_times = OrderedDict()
+        self.max_timers = 4096
+        self._next_timer_id = itertools.count().__next__
     
-    def start_timer(self, operation: str, request_id: Optional[str] = None) -> str:
+    def start_timer(self, operation: str, request_id: Optional[str] = None) -> int:
         """Start timing an operation."""
-        import time
-        timer_id = f"{operation}_{request_id}_{time.time()}"
-        self.start_times[timer_id] = time.time()
+        timer_id = self._next_timer_id()
+        self.start_times[timer_id] = time.perf_counter()
+        
+        if len(self.start_times) > self.max_timers:
+            leaked_id, _ = self.start_times.popitem(last=False)
+            self.logger.error("Timer %s was never ended; evicted", leaked_id)
+        
         return timer_id
     
-    def end_timer(self, timer_id: str, operation: str, 
+    def end_timer(self, timer_id: int, operation: str, 
                   request_id: Optional[str] = None, 
                   log_level: int = logging.INFO):
         """End timing and log the operation."""
-        import time
-        
-        if timer_id not in self.start_times:
-            self.logger.warning(f"Timer {timer_id} not found")
+        start_time = self.start_times.pop(timer_id, None)
+        if start_time is None:
+            self.logger.warning("Timer %s not found", timer_id)
             return
         
-        execution_time = time.time() - self.start_times[timer_id]
-        del self.start_times[timer_id]
-        
-        extra = {
-            'operation': operation,
-            'execution_time': execution_time
-        }
-        
-        if request_id:
-            extra['request_id'] = request_id
+        execution_time = time.perf_counter() - start_time
         
         # Log slow operations as warnings
         if execution_time > 5.0:  # 5 seconds threshold
             log_level = logging.WARNING
         
+        if not self.logger.isEnabledFor(log_level):
+            return
+        
+        extra = {
+            'operation': operation,
+            'execution_time': execution_time,
+            'request_id': request_id or None
+        }
+        
         self.logger.log(
             log_level,
-            f"Operation {operation} completed in {execution_time:.3f}s",
+            "Operation %s completed in %.3fs",
+            operation, execution_time,
             extra=extra
         )
 
@@ -254,24 +541,23 @@ class DatabaseLogger:
                   request_id: Optional[str] = None):
         """Log database query."""
         
+        # Log slow queries as warnings
+        level = logging.WARNING if execution_time > 1.0 else logging.DEBUG
+        if not self.logger.isEnabledFor(level):
+            return
+        
         extra = {
             'query_type': query_type,
             'table': table,
-            'execution_time': execution_time
+            'execution_time': execution_time,
+            'rows_affected': rows_affected,
+            'request_id': request_id or None
         }
         
-        if rows_affected is not None:
-            extra['rows_affected'] = rows_affected
-        
-        if request_id:
-            extra['request_id'] = request_id
-        
-        # Log slow queries as warnings
-        level = logging.WARNING if execution_time > 1.0 else logging.DEBUG
-        
         self.logger.log(
             level,
-            f"DB {query_type} on {table} - {execution_time:.3f}s",
+            "DB %s on %s - %.3fs",
+            query_type, table, execution_time,
             extra=extra
         )
     
@@ -280,14 +566,13 @@ class DatabaseLogger:
         """Log database connection error."""
         
         extra = {
-            'error_type': type(error).__name__
+            'error_type': error.__class__.__name__,
+            'request_id': request_id or None
         }
         
-        if request_id:
-            extra['request_id'] = request_id
-        
         self.logger.error(
-            f"Database connection error: {str(error)}",
+            "Database connection error: %s",
+            error,
             extra=extra,
             exc_info=True
         )
@@ -295,37 +580,42 @@ class DatabaseLogger:
 # Utility functions for common logging patterns
 def log_function_call(logger: logging.Logger):
     """Decorator to log function calls with execution time."""
-    import functools
-    import time
+    monotonic_ns = time.monotonic_ns
     
     def decorator(func):
+        func_name = func.__name__
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            # Integer nanoseconds; converted to seconds only on paths that log
+            start_ns = monotonic_ns()
             
             try:
                 result = func(*args, **kwargs)
-                execution_time = time.time() - start_time
                 
-                logger.debug(
-                    f"Function {func.__name__} completed in {execution_time:.3f}s",
-                    extra={
-                        'function': func.__name__,
-                        'execution_time': execution_time
-                    }
-                )
+                if logger.isEnabledFor(logging.DEBUG):
+                    execution_time = (monotonic_ns() - start_ns) / 1e9
+                    logger.debug(
+                        "Function %s completed in %.3fs",
+                        func_name, execution_time,
+                        extra={
+                            'function': func_name,
+                            'execution_time': execution_time
+                        }
+                    )
                 
                 return result
             
             except Exception as e:
-                execution_time = time.time() - start_time
+                execution_time = (monotonic_ns() - start_ns) / 1e9
                 
                 logger.error(
-                    f"Function {func.__name__} failed after {execution_time:.3f}s: {str(e)}",
+                    "Function %s failed after %.3fs: %s",
+                    func_name, execution_time, e,
                     extra={
-                        'function': func.__name__,
+                        'function': func_name,
                         'execution_time': execution_time,
-                        'error_type': type(e).__name__
+                        'error_type': e.__class__.__name__
                     },
                     exc_info=True
                 )
@@ -341,7 +631,7 @@ def get_logger(name: str) -> logging.Logger:
 def configure_root_logger(level: str = 'INFO'):
     """Configure root logger to prevent duplicate logs."""
     root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    root_logger.setLevel(_numeric_level(level))
     
     # Remove default handlers
     for handler in root_logger.handlers[:]: